@@ -3,14 +3,38 @@ import shutil
 import tempfile
 from pathlib import Path
 import multiprocessing
+import zlib
 
 import pyzipper
 import dask.bag as db
 from dask.diagnostics import ProgressBar
 
+from .solid import (
+    SOLID_BLOCK_SIZE,
+    SOLID_THRESHOLD,
+    is_solid_member,
+    pack_solid_blocks,
+    partition_by_size,
+    write_checksums,
+)
+
+
+def prepare_paths(files):
+    """Pair each file with its archive name: the path with its drive/root stripped."""
+    # Plain string slicing: building a Path per file dominated runtime on large trees
+    return [(str(f), os.path.splitdrive(str(f))[1].lstrip("\\/")) for f in files]
+
+
+class FileChunk:
+    """A chunk's (file_path, rel_path) pairs, wrapped so dask ships it as one value instead of walking every tuple."""
+
+    def __init__(self, file_pairs):
+        self.file_pairs = file_pairs
+
 
 def compress_chunk(chunk_data):
-    chunk_files, chunk_index, temp_dir, compression_level, password = chunk_data
+    chunk, chunk_index, temp_dir, compression_level, password, solid_threshold, solid_block_size = chunk_data
+    chunk_files = chunk.file_pairs
     temp_zip = os.path.join(temp_dir, f"chunk_{chunk_index}.zip")
 
     with pyzipper.AESZipFile(
@@ -23,6 +47,9 @@ def compress_chunk(chunk_data):
         if password:
             zipf.setpassword(password.encode())
 
+        small_files, chunk_files = partition_by_size(chunk_files, solid_threshold)
+        pack_solid_blocks(zipf, small_files, f"{chunk_index:05d}", solid_block_size)
+
         for file_path, rel_path in chunk_files:
             try:
                 zipf.write(file_path, arcname=rel_path)
@@ -32,13 +59,19 @@ def compress_chunk(chunk_data):
     return temp_zip
 
 
-def process_chunk_for_merge(chunk_file):
+def process_chunk_for_merge(merge_data):
+    chunk_file, password = merge_data
     try:
         items = []
         with pyzipper.AESZipFile(chunk_file, "r") as chunk_zip:
+            if password:
+                chunk_zip.setpassword(password.encode())
             for item in chunk_zip.infolist():
                 content = chunk_zip.read(item.filename)
-                items.append((item.filename, content))
+                # Fresh ZipInfo keeps the original timestamp and attributes, not the chunk's encryption state
+                zinfo = pyzipper.AESZipFile.zipinfo_cls(item.filename, item.date_time)
+                zinfo.external_attr = item.external_attr
+                items.append((zinfo, content))
         return items
     except Exception as e:
         print(f"Error processing chunk {chunk_file}: {e}")
@@ -46,31 +79,24 @@ def process_chunk_for_merge(chunk_file):
 
 
 class ParallelZipCompressor:
-    def __init__(self, compression_level=6, chunk_size=1000, min_files_for_chunking=500):
+    def __init__(self, compression_level=6, chunk_size=1000, min_files_for_chunking=500,
+                 solid_threshold=SOLID_THRESHOLD, solid_block_size=SOLID_BLOCK_SIZE):
         self.compression_level = compression_level
         self.chunk_size = chunk_size
         self.min_files_for_chunking = min_files_for_chunking
+        self.solid_threshold = solid_threshold
+        self.solid_block_size = solid_block_size
         self.temp_dir = None
 
     def _compress_direct(self, files, output_path, password=None):
         print(f"Using direct compression for {len(files)} files...")
         
-        files = [Path(f) for f in files]
         n_workers = min(16, max(1, multiprocessing.cpu_count() - 1))
         
-        def prepare_paths(file_path):
-            try:
-                rel_path = file_path.relative_to(file_path.anchor)
-                return str(file_path), str(rel_path)
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                return None
-        
-        bag = db.from_sequence(files, npartitions=n_workers)
+        print("Preparing file paths...")
+        file_pairs = prepare_paths(files)
         
-        with ProgressBar():
-            print("Preparing file paths...")
-            file_pairs = bag.map(prepare_paths).filter(lambda x: x).compute()
+        small_files, file_pairs = partition_by_size(file_pairs, self.solid_threshold)
         
         print(f"Creating ZIP archive directly: {output_path}")
         
@@ -84,16 +110,22 @@ class ParallelZipCompressor:
             if password:
                 zipf.setpassword(password.encode())
             
+            if small_files:
+                print(f"Packing {len(small_files)} small files into solid blocks...")
+                pack_solid_blocks(zipf, small_files, "00000", self.solid_block_size)
+            
             def add_file_to_zip(file_pair):
                 file_path, rel_path = file_pair
                 try:
+                    zinfo = pyzipper.AESZipFile.zipinfo_cls.from_file(file_path, rel_path, strict_timestamps=False)
                     with open(file_path, 'rb') as f:
                         content = f.read()
-                    return rel_path, content
+                    return zinfo, content
                 except Exception as e:
                     print(f"Error reading {file_path}: {e}")
                     return None
             
+            checksums = {}
             chunk_size = 100
             for i in range(0, len(file_pairs), chunk_size):
                 chunk = file_pairs[i:i+chunk_size]
@@ -103,8 +135,13 @@ class ParallelZipCompressor:
                     print(f"Processing files {i+1}-{min(i+chunk_size, len(file_pairs))} of {len(file_pairs)}...")
                     file_contents = chunk_bag.map(add_file_to_zip).filter(lambda x: x).compute()
                 
-                for rel_path, content in file_contents:
-                    zipf.writestr(rel_path, content)
+                for zinfo, content in file_contents:
+                    zipf.writestr(zinfo, content, compress_type=pyzipper.ZIP_DEFLATED,
+                                  compresslevel=self.compression_level)
+                    if password:
+                        checksums[zinfo.filename] = zlib.crc32(content)
+            
+            write_checksums(zipf, checksums)
         
         print(f"Direct compression completed: {output_path}")
         return Path(output_path).absolute()
@@ -116,19 +153,8 @@ class ParallelZipCompressor:
         try:
             print(f"Using chunked compression for {len(files)} files with {n_workers} workers...")
             
-            def prepare_paths(file_path):
-                try:
-                    rel_path = Path(file_path).relative_to(Path(file_path).anchor)
-                    return str(file_path), str(rel_path)
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
-                    return None
-            
-            bag = db.from_sequence(files, npartitions=n_workers)
-            
-            with ProgressBar():
-                print("Preparing file paths...")
-                file_pairs = bag.map(prepare_paths).filter(lambda x: x).compute()
+            print("Preparing file paths...")
+            file_pairs = prepare_paths(files)
             
             print(f"Preparing chunked compression for {len(file_pairs)} files...")
             
@@ -140,7 +166,8 @@ class ParallelZipCompressor:
             ]
             
             chunk_data = [
-                (chunk, idx, self.temp_dir, self.compression_level, password) 
+                (FileChunk(chunk), idx, self.temp_dir, self.compression_level, password,
+                 self.solid_threshold, self.solid_block_size)
                 for idx, chunk in enumerate(chunks)
             ]
             
@@ -164,10 +191,11 @@ class ParallelZipCompressor:
                 if password:
                     final_zip.setpassword(password.encode())
                 
+                checksums = {}
                 batch_size = max(1, len(chunk_files) // n_workers)
                 
                 for i in range(0, len(chunk_files), batch_size):
-                    batch = chunk_files[i:i+batch_size]
+                    batch = [(chunk_file, password) for chunk_file in chunk_files[i:i+batch_size]]
                     
                     chunk_bag = db.from_sequence(batch, npartitions=min(len(batch), n_workers))
                     
@@ -175,8 +203,13 @@ class ParallelZipCompressor:
                         print(f"Processing merge batch {i//batch_size + 1}/{(len(chunk_files)-1)//batch_size + 1}...")
                         batch_items = chunk_bag.map(process_chunk_for_merge).flatten().compute()
                     
-                    for filename, content in batch_items:
-                        final_zip.writestr(filename, content)
+                    for zinfo, content in batch_items:
+                        final_zip.writestr(zinfo, content, compress_type=pyzipper.ZIP_DEFLATED,
+                                           compresslevel=self.compression_level)
+                        if password and not is_solid_member(zinfo.filename):
+                            checksums[zinfo.filename] = zlib.crc32(content)
+                
+                write_checksums(final_zip, checksums)
             
             print(f"Chunked compression completed: {output_path}")
             return Path(output_path).absolute()
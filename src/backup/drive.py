@@ -6,6 +6,8 @@ import gzip
 import bz2
 import shutil
 
+from .solid import extract_archive
+
 
 def upload_to_drive_service(file_path: Path, folder_id: str, config_path: Path):
     gauth = GoogleAuth(settings_file=str(config_path))
@@ -37,7 +39,7 @@ def decrypt_and_extract_zip(zip_path: Path, output_dir: Path, password: str = No
     with pyzipper.AESZipFile(zip_path, 'r') as zf:
         if password:
             zf.pwd = password.encode('utf-8')
-        zf.extractall(path=output_dir)
+        extract_archive(zf, output_dir)
 
 def decompress_gzip(gz_path: Path, output_dir: Path):
     output_file = output_dir / gz_path.stem
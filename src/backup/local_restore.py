@@ -6,6 +6,7 @@ import pandas as pd
 from typing import List
 import click
 from src.utils.DatabaseManager import DatabaseManager
+from src.backup.solid import extract_archive
 
 def restore_backup(zip_path: Path, output_dir: Path, password: str = None) -> None:
     """Restore a backup from a single zip file"""
@@ -18,10 +19,10 @@ def restore_backup(zip_path: Path, output_dir: Path, password: str = None) -> No
         if password:
             with pyzipper.AESZipFile(zip_path, 'r') as zf:
                 zf.pwd = password.encode()
-                zf.extractall(output_dir)
+                extract_archive(zf, output_dir)
         else:
             with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(output_dir)
+                extract_archive(zf, output_dir)
 
         print(f"Restore completed successfully in: {output_dir}")
     except RuntimeError as e:
@@ -66,10 +67,10 @@ def restore_fragmented_backup(filename: str, output_dir: Path, password: str = N
             if password:
                 with pyzipper.AESZipFile(assembled_zip, 'r') as zf:
                     zf.pwd = password.encode()
-                    zf.extractall(output_dir)
+                    extract_archive(zf, output_dir)
             else:
                 with zipfile.ZipFile(assembled_zip, 'r') as zf:
-                    zf.extractall(output_dir)
+                    extract_archive(zf, output_dir)
             
             print(f"Successfully restored and extracted {filename} from {len(fragment_files)} fragments")
             print(f"Contents extracted to: {output_dir}")
@@ -0,0 +1,168 @@
+import io
+import json
+import os
+import zlib
+from pathlib import Path
+
+SOLID_DIR = "__solid__/"
+SOLID_THRESHOLD = 64 * 1024
+SOLID_BLOCK_SIZE = 4 * 1024 * 1024
+# Archive metadata unrelated to solid packing; never extracted
+CHECKSUMS_MEMBER = "__backup__/checksums.json"
+
+
+def is_solid_member(name):
+    return name.startswith(SOLID_DIR)
+
+
+def partition_by_size(file_pairs, threshold=SOLID_THRESHOLD):
+    """Split (file_path, rel_path) pairs into small files for solid packing and regular files."""
+    small, large = [], []
+    for file_path, rel_path in file_pairs:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            large.append((file_path, rel_path))
+            continue
+        if size < threshold:
+            small.append((file_path, rel_path))
+        else:
+            large.append((file_path, rel_path))
+    return small, large
+
+
+def pack_solid_blocks(zipf, file_pairs, block_prefix, block_size=SOLID_BLOCK_SIZE):
+    """
+    Concatenate small files into large blocks stored as single ZIP members.
+
+    Each block is written as ``__solid__/block_<prefix>_<n>.bin`` and a side index
+    ``__solid__/index_<prefix>.json`` lists, for every packed file, its block,
+    offset, size, mtime and CRC-32 so any file can be read back without scanning.
+    Empty files get no block (``null``) since there is nothing to store. Paths are
+    stored with ``/`` separators, like regular ZIP member names.
+
+    Args:
+        zipf: Open, writable ZIP file
+        file_pairs: List of (file_path, rel_path) tuples
+        block_prefix: Unique prefix for this writer's block and index names
+        block_size: Uncompressed size at which a block is flushed
+
+    Returns:
+        Number of files packed
+    """
+    if not file_pairs:
+        return 0
+
+    entries = []
+    buffer = io.BytesIO()
+    block_number = 0
+
+    def block_name(number):
+        return f"{SOLID_DIR}block_{block_prefix}_{number:04d}.bin"
+
+    current_block = block_name(block_number)
+
+    def flush():
+        nonlocal buffer, block_number, current_block
+        if buffer.tell():
+            zipf.writestr(current_block, buffer.getvalue())
+            block_number += 1
+            current_block = block_name(block_number)
+            buffer = io.BytesIO()
+
+    for file_path, rel_path in file_pairs:
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except Exception as e:
+            print(f"Error adding {file_path}: {e}")
+            continue
+
+        rel_path = rel_path.replace(os.sep, "/")
+        if not content:
+            entries.append([rel_path, None, 0, 0, mtime, 0])
+            continue
+
+        if buffer.tell() and buffer.tell() + len(content) > block_size:
+            flush()
+
+        entries.append([rel_path, current_block, buffer.tell(), len(content), mtime,
+                        zlib.crc32(content)])
+        buffer.write(content)
+
+    flush()
+
+    index = {"version": 1, "entries": entries}
+    zipf.writestr(f"{SOLID_DIR}index_{block_prefix}.json", json.dumps(index, separators=(",", ":")))
+    return len(entries)
+
+
+def load_solid_index(zf):
+    """Return {rel_path: (block_name, offset, size, mtime, crc)} for every solid entry in an archive."""
+    index = {}
+    for name in zf.namelist():
+        if name.startswith(f"{SOLID_DIR}index_"):
+            data = json.loads(zf.read(name))
+            for rel_path, block, offset, size, mtime, *rest in data["entries"]:
+                index[rel_path] = (block, offset, size, mtime, rest[0] if rest else None)
+    return index
+
+
+def write_checksums(zipf, checksums):
+    """
+    Store {member_name: crc} for regular members of an encrypted archive.
+
+    WZ_AES (AE-2) entries record a CRC of 0 in the central directory, so the real
+    CRC-32 is kept here, inside the encrypted archive, for the catalog to use.
+    """
+    if checksums:
+        zipf.writestr(CHECKSUMS_MEMBER, json.dumps(checksums, separators=(",", ":")))
+
+
+def load_checksums(zf):
+    """Return the {member_name: crc} map written by write_checksums, or {} if absent."""
+    if CHECKSUMS_MEMBER not in zf.namelist():
+        return {}
+    return json.loads(zf.read(CHECKSUMS_MEMBER))
+
+
+def read_solid_file(zf, rel_path, index=None):
+    """Read a single solid-packed file by decompressing only the block that holds it."""
+    if index is None:
+        index = load_solid_index(zf)
+    if rel_path not in index:
+        raise KeyError(f"There is no solid entry named {rel_path!r} in the archive")
+
+    block, offset, size, _, _ = index[rel_path]
+    if not size:
+        return b""
+    with zf.open(block) as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def extract_solid_blocks(zf, output_dir):
+    """Unpack every solid block in an archive into output_dir, reading each block once."""
+    output_dir = Path(output_dir).resolve()
+    by_block = {}
+    for rel_path, (block, offset, size, mtime, _) in load_solid_index(zf).items():
+        by_block.setdefault(block, []).append((rel_path, offset, size, mtime))
+
+    for block, members in by_block.items():
+        data = zf.read(block) if block is not None else b""
+        for rel_path, offset, size, mtime in members:
+            target = output_dir.joinpath(*rel_path.split("/")).resolve()
+            if output_dir not in target.parents:
+                raise RuntimeError(f"Refusing to extract {rel_path!r} outside {output_dir}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data[offset:offset + size])
+            os.utime(target, (mtime, mtime))
+
+
+def extract_archive(zf, output_dir):
+    """Extract a backup archive, expanding solid blocks back into their original files."""
+    regular = [name for name in zf.namelist() if not is_solid_member(name) and name != CHECKSUMS_MEMBER]
+    zf.extractall(output_dir, members=regular)
+    extract_solid_blocks(zf, output_dir)
@@ -5,9 +5,12 @@ import multiprocessing
 
 from .utils.file_finder import FileFinder
 from .backup.compresion import ParallelZipCompressor
+from .backup.solid import SOLID_THRESHOLD
 from .utils.storage import storage_menu
 from .backup.drive import upload_to_drive_service, restore_backup_drive
 from .backup.local_restore import restore_backup, restore_fragmented_backup
+from .utils.catalog import Catalog, to_archive_path
+from .utils.DatabaseManager import DatabaseManager
 
 @click.group()
 def cli():
@@ -20,7 +23,8 @@ def cli():
 @click.option('--password', '-p', type=str, default=None, help='Password for encryption (optional)')
 @click.option('--workers', '-w', type=int, default=None, help='Number of processes (default: auto)')
 @click.option('--chunk-size', '-c', type=int, default=1000, help='Chunk size for parallel compression')
-def backup(folders, output, password, workers, chunk_size):
+@click.option('--solid-threshold', '-s', type=int, default=SOLID_THRESHOLD, help='Files smaller than this many bytes are packed into solid blocks (0 disables)')
+def backup(folders, output, password, workers, chunk_size, solid_threshold):
     if not folders:
         raise click.UsageError('You must specify at least one folder')
     
@@ -35,11 +39,19 @@ def backup(folders, output, password, workers, chunk_size):
             raise click.ClickException('No files found in the provided folders')
         
         output_path = output or f'backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
-        compressor = ParallelZipCompressor(compression_level=6, chunk_size=chunk_size)
+        compressor = ParallelZipCompressor(compression_level=6, chunk_size=chunk_size, solid_threshold=solid_threshold)
         result_path = compressor.compress(files, output_path, password)
 
         click.echo(f'✔ Backup completed successfully: {result_path}')
         
+        try:
+            catalog_db = Catalog()
+            entries = catalog_db.record_archive(result_path, password)
+            catalog_db.close()
+            click.echo(f'✔ Cataloged {entries} entries')
+        except Exception as e:
+            click.echo(f'X  Error updating the catalog: {e}', err=True)
+        
         if click.confirm('\nDo you want to save a copy to external storage?'):
             storage_menu(Path(result_path))
         
@@ -98,5 +110,92 @@ def restore_fragmented(filename, output_dir, password):
         click.echo(f" X  Error during fragmented restore: {e}", err=True)
         raise
 
+# ---------------------- CATALOG GROUP ---------------------- #
+def format_entries(rows):
+    for path, size, mtime, hash_, archive, fragment in rows:
+        modified = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S') if mtime else '-'
+        location = f"{archive} ({fragment})" if fragment else archive
+        click.echo(f"{path}  {size} bytes  {modified}  {hash_ or '-'}  {location}")
+
+@cli.group()
+def catalog():
+    """Commands to query the catalog of archived files"""
+    pass
+
+# ---- Subcommand: Search catalog ---- #
+@catalog.command('search')
+@click.argument('pattern')
+@click.option('--limit', '-l', type=int, default=100, help='Maximum number of results')
+def catalog_search(pattern, limit):
+    """Find archived files whose path matches PATTERN (glob or substring)"""
+    catalog_db = Catalog()
+    rows = catalog_db.search(pattern, limit)
+    catalog_db.close()
+    if not rows:
+        click.echo('No matching entries in the catalog')
+        return
+    format_entries(rows)
+
+# ---- Subcommand: File history ---- #
+@catalog.command('history')
+@click.argument('file_path', type=click.Path(path_type=Path))
+def catalog_history(file_path):
+    """List every backup holding a version of FILE_PATH"""
+    catalog_db = Catalog()
+    rows = catalog_db.history(to_archive_path(file_path))
+    catalog_db.close()
+    if not rows:
+        click.echo(f'No versions of {file_path} in the catalog')
+        return
+    format_entries(rows)
+
+# ---- Subcommand: Rebuild catalog ---- #
+@catalog.command('rebuild')
+@click.argument('archives', nargs=-1, type=click.Path(exists=True, path_type=Path))
+@click.option('--password', '-p', default=None, help='Password if the backups are encrypted')
+@click.option('--workers', '-w', type=int, default=None, help='Number of processes (default: auto)')
+def catalog_rebuild(archives, password, workers):
+    """Rebuild the catalog from ARCHIVES (zip files or folders of them) and all recorded fragmented backups.
+
+    Archives not found in this run are dropped from the catalog.
+    """
+    sources = {}
+    for archive in archives:
+        for zip_path in (sorted(archive.glob('*.zip')) if archive.is_dir() else [archive]):
+            previous = sources.get(zip_path.name)
+            if previous and previous[0].resolve() != zip_path.resolve():
+                raise click.UsageError(
+                    f"Two archives are named {zip_path.name}: {previous[0]} and {zip_path}. "
+                    "The catalog identifies backups by file name; rename one of them"
+                )
+            sources[zip_path.name] = [zip_path]
+
+    unavailable = []
+    fragment_sizes = {}
+    fragments_db = DatabaseManager().db
+    for filename, group in fragments_db.groupby('filename'):
+        fragments = sorted((Path(p) for p in group['path']), key=lambda p: p.name)
+        available = all(p.exists() for p in fragments)
+        if filename in sources:
+            # Scan the local copy; fragments on unplugged devices keep their recorded locations
+            if available:
+                fragment_sizes[filename] = [(p.name, p.stat().st_size) for p in fragments]
+            continue
+        if available:
+            sources[filename] = fragments
+        else:
+            unavailable.append(filename)
+            click.echo(f"Skipping {filename}: not all fragments are available (existing entries kept)")
+
+    if not sources and not unavailable:
+        raise click.UsageError('No archives to catalog')
+
+    catalog_db = Catalog()
+    entries, failed = catalog_db.rebuild(sources, password, workers, keep=unavailable, fragments=fragment_sizes)
+    catalog_db.close()
+    click.echo(f"✔ Cataloged {entries} entries from {len(sources) - len(failed)} archives")
+    for name, error in failed.items():
+        click.echo(f"X  Could not catalog {name} (existing entries kept): {error}", err=True)
+
 if __name__ == '__main__':
     cli()
@@ -0,0 +1,337 @@
+import io
+import os
+import sqlite3
+import time
+from datetime import datetime
+from os import path
+from pathlib import Path
+import multiprocessing
+
+import pyzipper
+import dask.bag as db
+from dask.diagnostics import ProgressBar
+
+from src.backup.solid import CHECKSUMS_MEMBER, is_solid_member, load_checksums, load_solid_index
+
+
+class ConcatenatedFile(io.RawIOBase):
+    """Read-only, seekable view over fragment files as if they were one archive."""
+
+    def __init__(self, paths):
+        self.paths = [str(p) for p in paths]
+        self.sizes = [os.path.getsize(p) for p in self.paths]
+        self.length = sum(self.sizes)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.length + offset
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length - self.position
+        chunks = []
+        start = 0
+        for fragment, fragment_size in zip(self.paths, self.sizes):
+            end = start + fragment_size
+            if size > 0 and start <= self.position < end:
+                with open(fragment, 'rb') as f:
+                    f.seek(self.position - start)
+                    data = f.read(min(size, end - self.position))
+                chunks.append(data)
+                self.position += len(data)
+                size -= len(data)
+            start = end
+        return b"".join(chunks)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def fragment_ranges(fragments):
+    """Return [(fragment_name, start, end)] byte ranges for ordered fragment paths."""
+    ranges = []
+    start = 0
+    for fragment in fragments:
+        size = os.path.getsize(fragment)
+        ranges.append((Path(fragment).name, start, start + size))
+        start += size
+    return ranges
+
+
+def scan_archive(scan_data):
+    """
+    Read the central directory (and solid indexes) of one archive into catalog rows.
+
+    Args:
+        scan_data: Tuple of (archive_name, paths, password); paths holds the archive
+            itself or its ordered fragments
+
+    Returns:
+        Tuple of (archive_name, created, rows, error) where rows are
+        (path, size, mtime, hash, archive, fragment, member, offset, solid_offset).
+        A scan that fails part way returns no rows and the error message, so a
+        partial listing never replaces a good one.
+    """
+    archive_name, paths, password = scan_data
+
+    def fragment_for(offset):
+        if offset is None:
+            return None
+        for name, start, end in ranges:
+            if start <= offset < end:
+                return name
+        return None
+
+    rows = []
+    source = None
+    try:
+        created = archive_created(archive_name) or os.path.getmtime(paths[0])
+        source = str(paths[0]) if len(paths) == 1 else ConcatenatedFile(paths)
+        ranges = fragment_ranges(paths) if len(paths) > 1 else []
+
+        with pyzipper.AESZipFile(source, 'r') as zf:
+            if password:
+                zf.pwd = password.encode()
+
+            infos = {info.filename: info for info in zf.infolist()}
+            checksums = load_checksums(zf)
+            for info in infos.values():
+                if is_solid_member(info.filename) or info.filename == CHECKSUMS_MEMBER or info.is_dir():
+                    continue
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                # Encrypted (AE-2) entries carry no CRC; only trust one we stored ourselves
+                crc = checksums.get(info.filename, None if info.flag_bits & 0x1 else info.CRC)
+                rows.append((info.filename, info.file_size, mtime, f"crc32:{crc:08x}" if crc is not None else None,
+                             archive_name, fragment_for(info.header_offset), info.filename,
+                             info.header_offset, None))
+
+            for rel_path, (block, offset, size, mtime, crc) in load_solid_index(zf).items():
+                if block is not None and block not in infos:
+                    raise RuntimeError(f"Solid entry {rel_path!r} refers to missing block {block!r}")
+                header_offset = infos[block].header_offset if block is not None else None
+                rows.append((rel_path, size, mtime, f"crc32:{crc:08x}" if crc is not None else None,
+                             archive_name, fragment_for(header_offset), block, header_offset, offset))
+    except Exception as e:
+        return archive_name, None, [], str(e)
+    finally:
+        if isinstance(source, ConcatenatedFile):
+            source.close()
+
+    return archive_name, created, rows, None
+
+
+class Catalog:
+    """Local SQLite index of every file archived by every backup."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or path.join(path.dirname(__file__), '..', '..', 'catalog.db')
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS archives (
+                name TEXT PRIMARY KEY,
+                created REAL,
+                entries INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                hash TEXT,
+                archive TEXT NOT NULL,
+                fragment TEXT,
+                member TEXT,
+                offset INTEGER,
+                solid_offset INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_path ON entries(path);
+            CREATE INDEX IF NOT EXISTS idx_entries_archive ON entries(archive);
+        """)
+        self.fts = self._create_path_index()
+
+    def _create_path_index(self):
+        """
+        Keep a trigram full-text index of entry paths so substring and leading-wildcard
+        searches avoid a full table scan. Returns False if this SQLite lacks FTS5 trigram.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'"
+        ).fetchone()
+        try:
+            with self.conn:
+                self.conn.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                        path, content='entries', content_rowid='rowid',
+                        tokenize='trigram case_sensitive 1'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+                        INSERT INTO entries_fts(rowid, path) VALUES (new.rowid, new.path);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+                        INSERT INTO entries_fts(entries_fts, rowid, path) VALUES ('delete', old.rowid, old.path);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF path ON entries BEGIN
+                        INSERT INTO entries_fts(entries_fts, rowid, path) VALUES ('delete', old.rowid, old.path);
+                        INSERT INTO entries_fts(rowid, path) VALUES (new.rowid, new.path);
+                    END;
+                """)
+                if not exists:
+                    self.conn.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    def close(self):
+        self.conn.close()
+
+    def _store(self, archive_name, created, rows):
+        with self.conn:
+            # Rescanning the local copy of a fragmented backup must not forget where its fragments are
+            known_fragments = dict(self.conn.execute(
+                "SELECT offset, fragment FROM entries WHERE archive = ? AND fragment IS NOT NULL",
+                (archive_name,),
+            ))
+            if known_fragments:
+                rows = [row[:5] + (row[5] or known_fragments.get(row[7]),) + row[6:] for row in rows]
+            self.conn.execute("DELETE FROM entries WHERE archive = ?", (archive_name,))
+            self.conn.executemany(
+                "INSERT INTO entries (path, size, mtime, hash, archive, fragment, member, offset, solid_offset) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO archives VALUES (?, ?, ?)",
+                (archive_name, created, len(rows)),
+            )
+
+    def record_archive(self, archive_path, password=None):
+        """Catalog a freshly written archive. Returns the number of entries recorded."""
+        archive_path = Path(archive_path)
+        name, created, rows, error = scan_archive((archive_path.name, [archive_path], password))
+        if error:
+            raise RuntimeError(f"Failed to catalog {name}: {error}")
+        self._store(name, created, rows)
+        return len(rows)
+
+    def assign_fragments(self, archive_name, fragments):
+        """Record which fragment holds each entry, given ordered (fragment_name, size) pairs."""
+        start = 0
+        with self.conn:
+            for fragment_name, size in fragments:
+                self.conn.execute(
+                    "UPDATE entries SET fragment = ? WHERE archive = ? AND offset >= ? AND offset < ?",
+                    (fragment_name, archive_name, start, start + size),
+                )
+                start += size
+
+    def rebuild(self, archives, password=None, max_workers=None, keep=(), fragments=None):
+        """
+        Rebuild the catalog from existing archives, scanning them in parallel.
+
+        Archives that are neither given nor listed in ``keep`` are removed from the
+        catalog, so afterwards it describes exactly the archives that exist.
+
+        Args:
+            archives: Dict of {archive_name: [paths]} where paths is the archive
+                itself or its ordered fragments
+            password: Password for encrypted archives
+            max_workers: Maximum number of parallel workers
+            keep: Archive names that could not be scanned (e.g. fragments on an
+                unplugged device) whose existing entries should be kept
+            fragments: Dict of {archive_name: [(fragment_name, size)]} for archives
+                scanned from a local copy that was also fragmented
+
+        Returns:
+            Tuple of (entries recorded, {archive_name: error} for archives that
+            failed to scan and whose existing rows were left untouched)
+        """
+        if max_workers is None:
+            max_workers = min(8, max(1, multiprocessing.cpu_count() - 1))
+
+        scan_data = [(name, paths, password) for name, paths in archives.items()]
+        results = []
+        if scan_data:
+            bag = db.from_sequence(scan_data, npartitions=min(len(scan_data), max_workers))
+
+            with ProgressBar():
+                print(f"Scanning {len(scan_data)} archives with {max_workers} workers...")
+                results = bag.map(scan_archive).compute()
+
+        retained = set(archives) | set(keep)
+        stale = [name for (name,) in self.conn.execute("SELECT name FROM archives") if name not in retained]
+        with self.conn:
+            for name in stale:
+                self.conn.execute("DELETE FROM entries WHERE archive = ?", (name,))
+                self.conn.execute("DELETE FROM archives WHERE name = ?", (name,))
+
+        total = 0
+        failed = {}
+        for name, created, rows, error in results:
+            if error:
+                failed[name] = error
+                continue
+            self._store(name, created, rows)
+            if fragments and name in fragments:
+                self.assign_fragments(name, fragments[name])
+            total += len(rows)
+        return total, failed
+
+    def search(self, pattern, limit=100):
+        """
+        Find entries whose path matches a glob pattern (substring match if it has no wildcards).
+
+        Uses the trigram index when available; patterns without a run of three
+        literal characters still fall back to scanning every path.
+        """
+        if not any(c in pattern for c in "*?["):
+            pattern = f"*{pattern}*"
+        if self.fts:
+            query = (
+                "SELECT e.path, e.size, e.mtime, e.hash, e.archive, e.fragment FROM entries_fts f "
+                "JOIN entries e ON e.rowid = f.rowid WHERE f.path GLOB ? ORDER BY e.path, e.mtime DESC LIMIT ?"
+            )
+        else:
+            query = (
+                "SELECT path, size, mtime, hash, archive, fragment FROM entries "
+                "WHERE path GLOB ? ORDER BY path, mtime DESC LIMIT ?"
+            )
+        return self.conn.execute(query, (pattern, limit)).fetchall()
+
+    def history(self, file_path):
+        """Every archived version of one path, oldest backup first."""
+        return self.conn.execute(
+            "SELECT e.path, e.size, e.mtime, e.hash, e.archive, e.fragment FROM entries e "
+            "LEFT JOIN archives a ON a.name = e.archive WHERE e.path = ? ORDER BY a.created, e.archive",
+            (file_path,),
+        ).fetchall()
+
+
+def archive_created(archive_name):
+    """Parse the timestamp out of a backup_YYYYMMDD_HHMMSS.zip name, if it has one."""
+    try:
+        return datetime.strptime(Path(archive_name).stem, "backup_%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        return None
+
+
+def to_archive_path(file_path):
+    """Convert a filesystem path to the form it is stored under inside archives."""
+    file_path = Path(file_path).resolve()
+    return file_path.relative_to(file_path.anchor).as_posix()
@@ -5,6 +5,7 @@ from typing import Tuple, List
 import click
 import psutil
 from .DatabaseManager import DatabaseManager
+from .catalog import Catalog
 
 
 def get_connected_devices() -> List[Tuple[str, str]]:
@@ -114,6 +115,7 @@ def storage_menu(file_path: Path) -> None:
                 total_parts = len(part_estimation)
                 remaining = file_size
                 part_index = 1
+                written_parts = []
                 
                 for mountpoint, bytes_to_assign in part_estimation:
                     part_name = f"{file_path.stem}.part{part_index:03d}"
@@ -133,6 +135,7 @@ def storage_menu(file_path: Path) -> None:
                             filename=file_path.name,
                             path=str(Path(mountpoint) / part_name)
                         )
+                        written_parts.append((part_name, bytes_to_assign))
                         
                         try:
                             part_path.unlink()
@@ -146,6 +149,13 @@ def storage_menu(file_path: Path) -> None:
                         click.echo("Copy failed. Try a different device or size.")
                         break
                 
+                try:
+                    catalog_db = Catalog()
+                    catalog_db.assign_fragments(file_path.name, written_parts)
+                    catalog_db.close()
+                except Exception as e:
+                    click.echo(f"Error updating catalog fragments: {e}")
+                
                 click.echo(f"\nFragmentation complete! File '{file_path.name}' split into {total_parts} parts.")
                 click.echo("Fragments have been recorded in the database.")
 
@@ -0,0 +1,173 @@
+import os
+import zlib
+from pathlib import Path
+
+import dask
+import pytest
+
+from src.backup.compresion import ParallelZipCompressor
+from src.backup.solid import SOLID_THRESHOLD
+from src.utils.catalog import Catalog, ConcatenatedFile, scan_archive, to_archive_path
+
+
+@pytest.fixture(autouse=True)
+def synchronous_dask():
+    with dask.config.set(scheduler="synchronous"):
+        yield
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "docs").mkdir(parents=True)
+    contents = {f"docs/note{i}.txt": f"note {i}\n".encode() * (i + 1) for i in range(30)}
+    contents["docs/empty.txt"] = b""
+    contents["report.bin"] = os.urandom(SOLID_THRESHOLD + 1)
+    for name, data in contents.items():
+        (root / name).write_bytes(data)
+    return root, contents
+
+
+def make_backup(tmp_path, tree, name, password=None):
+    root, _ = tree
+    files = sorted(str(p.resolve()) for p in root.rglob("*") if p.is_file())
+    return Path(ParallelZipCompressor().compress(files, str(tmp_path / name), password))
+
+
+def split(archive, parts):
+    data = archive.read_bytes()
+    step = len(data) // parts + 1
+    fragments = []
+    for i in range(parts):
+        fragment = archive.parent / f"{archive.stem}.part{i + 1:03d}"
+        fragment.write_bytes(data[i * step:(i + 1) * step])
+        fragments.append(fragment)
+    return fragments
+
+
+def test_concatenated_file_reads_across_fragments(tmp_path):
+    data = bytes(range(256)) * 10
+    paths = []
+    for i, (start, end) in enumerate([(0, 700), (700, 701), (701, len(data))]):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(data[start:end])
+        paths.append(path)
+
+    f = ConcatenatedFile(paths)
+    assert f.read() == data
+    f.seek(695)
+    assert f.read(10) == data[695:705]
+    f.seek(-5, os.SEEK_END)
+    assert f.read(100) == data[-5:]
+    f.seek(0)
+    f.seek(699, os.SEEK_CUR)
+    assert f.read(3) == data[699:702]
+
+
+def test_split_archive_scans_in_place(tmp_path, tree):
+    archive = make_backup(tmp_path, tree, "backup_20250101_000000.zip")
+    _, _, whole, error = scan_archive((archive.name, [archive], None))
+    assert error is None
+
+    fragments = split(archive, 3)
+    _, _, parts, error = scan_archive((archive.name, fragments, None))
+    assert error is None
+
+    sizes = [f.stat().st_size for f in fragments]
+    bounds = [(f.name, sum(sizes[:i]), sum(sizes[:i + 1])) for i, f in enumerate(fragments)]
+    assert sorted(row[:5] + row[6:] for row in parts) == sorted(row[:5] + row[6:] for row in whole)
+    for row in parts:
+        offset, fragment = row[7], row[5]
+        if offset is None:
+            assert fragment is None
+        else:
+            assert any(name == fragment and start <= offset < end for name, start, end in bounds)
+
+
+def test_encrypted_archive_records_real_crc(tmp_path, tree):
+    root, contents = tree
+    archive = make_backup(tmp_path, tree, "backup_20250101_000000.zip", password="secret")
+
+    _, _, rows, error = scan_archive((archive.name, [archive], "secret"))
+    assert error is None
+    hashes = {row[0]: row[3] for row in rows}
+    for name, data in contents.items():
+        assert hashes[to_archive_path(root / name)] == f"crc32:{zlib.crc32(data):08x}"
+
+    _, _, rows, error = scan_archive((archive.name, [archive], None))
+    assert rows == [] and error
+
+
+def test_search_matches_plain_scan(tmp_path, tree):
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    catalog.record_archive(make_backup(tmp_path, tree, "backup_20250101_000000.zip"))
+    if not catalog.fts:
+        pytest.skip("SQLite lacks FTS5 trigram support")
+
+    for pattern in ["note1", "docs/note2*", "*.bin", "*/note?.txt", "xyz", "t"]:
+        indexed = catalog.search(pattern, limit=1000)
+        catalog.fts = False
+        scanned = catalog.search(pattern, limit=1000)
+        catalog.fts = True
+        assert indexed == scanned, pattern
+    assert catalog.search("note1", limit=1000)
+
+
+def test_history_is_ordered_by_backup_time(tmp_path, tree):
+    root, _ = tree
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    for name in ["backup_20250301_000000.zip", "backup_20250101_000000.zip", "backup_20250201_000000.zip"]:
+        catalog.record_archive(make_backup(tmp_path, tree, name))
+
+    history = catalog.history(to_archive_path(root / "docs" / "note3.txt"))
+    assert [row[4] for row in history] == [
+        "backup_20250101_000000.zip", "backup_20250201_000000.zip", "backup_20250301_000000.zip",
+    ]
+
+
+def test_rebuild_removes_stale_and_keeps_failed_or_unavailable(tmp_path, tree):
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    plain = make_backup(tmp_path, tree, "backup_20250101_000000.zip")
+    encrypted = make_backup(tmp_path, tree, "backup_20250102_000000.zip", password="secret")
+    unplugged = make_backup(tmp_path, tree, "backup_20250103_000000.zip")
+    stale = make_backup(tmp_path, tree, "backup_20250104_000000.zip")
+    for archive, password in [(plain, None), (encrypted, "secret"), (unplugged, None), (stale, None)]:
+        catalog.record_archive(archive, password)
+
+    def counts():
+        return dict(catalog.conn.execute("SELECT archive, COUNT(*) FROM entries GROUP BY archive"))
+
+    before = counts()
+    entries, failed = catalog.rebuild(
+        {plain.name: [plain], encrypted.name: [encrypted]}, keep=[unplugged.name],
+    )
+
+    assert list(failed) == [encrypted.name]
+    assert entries == before[plain.name]
+    assert counts() == {name: before[name] for name in (plain.name, encrypted.name, unplugged.name)}
+
+
+def test_rebuild_keeps_fragment_locations(tmp_path, tree):
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    archive = make_backup(tmp_path, tree, "backup_20250101_000000.zip")
+    fragments = [(f.name, f.stat().st_size) for f in split(archive, 2)]
+    catalog.record_archive(archive)
+    catalog.assign_fragments(archive.name, fragments)
+
+    def located():
+        return catalog.conn.execute("SELECT COUNT(*) FROM entries WHERE fragment IS NOT NULL").fetchone()[0]
+
+    assert located()
+    expected = located()
+    catalog.rebuild({archive.name: [archive]})
+    assert located() == expected
+
+    fresh = Catalog(str(tmp_path / "fresh.db"))
+    fresh.rebuild({archive.name: [archive]}, fragments={archive.name: fragments})
+    assert fresh.conn.execute("SELECT COUNT(*) FROM entries WHERE fragment IS NOT NULL").fetchone()[0] == expected
+
+
+def test_to_archive_path(tmp_path):
+    path = tmp_path / "a" / "b.txt"
+    assert to_archive_path(path) == path.resolve().relative_to(path.resolve().anchor).as_posix()
+    assert not to_archive_path(path).startswith("/")
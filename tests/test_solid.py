@@ -0,0 +1,101 @@
+import io
+import os
+from pathlib import Path
+
+import dask
+import pyzipper
+import pytest
+
+from src.backup.compresion import ParallelZipCompressor
+from src.backup.local_restore import restore_backup
+from src.backup.solid import (
+    SOLID_THRESHOLD,
+    extract_archive,
+    is_solid_member,
+    pack_solid_blocks,
+    read_solid_file,
+)
+
+
+def write_files(root, contents):
+    pairs = []
+    for name, data in contents.items():
+        file_path = root / name
+        file_path.write_bytes(data)
+        pairs.append((str(file_path), name))
+    return pairs
+
+
+def round_trip(tmp_path, contents, block_size=1024):
+    src = tmp_path / "src"
+    src.mkdir()
+    pairs = write_files(src, contents)
+
+    buffer = io.BytesIO()
+    with pyzipper.AESZipFile(buffer, "w", compression=pyzipper.ZIP_DEFLATED) as zf:
+        assert pack_solid_blocks(zf, pairs, "00000", block_size) == len(contents)
+
+    out = tmp_path / "out"
+    with pyzipper.AESZipFile(buffer, "r") as zf:
+        extract_archive(zf, out)
+        for name, data in contents.items():
+            assert read_solid_file(zf, name) == data
+
+    for name, data in contents.items():
+        assert (out / name).read_bytes() == data
+        assert os.path.getmtime(out / name) == os.path.getmtime(src / name)
+
+
+def test_round_trip_across_blocks(tmp_path):
+    round_trip(tmp_path, {f"f{i}.txt": f"line {i}\n".encode() * (i * 10) for i in range(1, 20)})
+
+
+def test_round_trip_only_empty_files(tmp_path):
+    round_trip(tmp_path, {"__init__.py": b"", "lock": b""})
+
+
+def test_round_trip_mixed_empty_files(tmp_path):
+    round_trip(tmp_path, {"a": b"", "b": b"data", "c": b"", "d": b"x" * 2000})
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    (root / "pkg").mkdir(parents=True)
+    contents = {f"pkg/mod{i}.py": f"value = {i}\n".encode() * i for i in range(40)}
+    contents["pkg/__init__.py"] = b""
+    contents["large.bin"] = os.urandom(SOLID_THRESHOLD + 1)
+    for name, data in contents.items():
+        (root / name).write_bytes(data)
+    return root, contents
+
+
+@pytest.mark.parametrize("min_files_for_chunking, password, solid_threshold", [
+    (1000, None, SOLID_THRESHOLD),
+    (1, None, SOLID_THRESHOLD),
+    (1, "secret", SOLID_THRESHOLD),
+    (1000, "secret", SOLID_THRESHOLD),
+    (1, None, 0),
+])
+def test_compress_and_restore(tmp_path, tree, min_files_for_chunking, password, solid_threshold):
+    root, contents = tree
+    files = sorted(str(p.resolve()) for p in root.rglob("*") if p.is_file())
+    compressor = ParallelZipCompressor(
+        chunk_size=10, min_files_for_chunking=min_files_for_chunking, solid_threshold=solid_threshold
+    )
+
+    with dask.config.set(scheduler="synchronous"):
+        archive = compressor.compress(files, str(tmp_path / "backup.zip"), password)
+
+    with pyzipper.AESZipFile(archive) as zf:
+        names = zf.namelist()
+    assert any(name.endswith("/large.bin") for name in names)
+    assert any(is_solid_member(name) for name in names) == bool(solid_threshold)
+
+    out = tmp_path / "restored"
+    restore_backup(Path(archive), out, password)
+    restored_root = out / root.resolve().relative_to(root.resolve().anchor)
+    for name, data in contents.items():
+        assert (restored_root / name).read_bytes() == data
+    assert not (out / "__solid__").exists()
+    assert not (out / "__backup__").exists()